@@ -121,19 +121,22 @@ ensure the order is correct and preserved, no matter how the user invokes us"""
         all_params = {p.name: p for p in self.order}
         priority_adjustments = [[all_params[name] for name in adjustment if name in all_params]
                                 for adjustment in priority_adjustments or []]
+        pos = {p: i for i, p in enumerate(self.order)}
         for adjustment in priority_adjustments:
             # We're trying to nudge the order just enough to satisfy the
             # ordering in the current adjustment without affecting other
             # elements. To do this, we create the list of *current* indexes of
             # the relevant params in ctx.params, then sort it. Then we insert
             # each param in turn in the given spot in the list
-            indexes = [self.order.index(p) for p in adjustment]
+            indexes = [pos[p] for p in adjustment]
             for param, slot in zip(adjustment, sorted(indexes)):
                 self.order[slot] = param
+                pos[param] = slot
         # Finally, things in priority list just go into the front unconditionally
+        prioritised = frozenset(priority_list)
         self.order = [
             all_params[param] for param in priority_list if param in all_params
-        ] + [p for p in self.order if p.name not in priority_list]
+        ] + [p for p in self.order if p.name not in prioritised]
         super().__init__(ctx)
 
     def parse_args(self, args):
@@ -142,8 +145,8 @@ ensure the order is correct and preserved, no matter how the user invokes us"""
 
 
 class PriorityProcessingCommand(cloup.Command):
-    PRIORITY_LIST = []
-    PRIORITY_ADJUSTMENTS = []
+    PRIORITY_LIST = ()
+    PRIORITY_ADJUSTMENTS = ()
 
     def make_parser(self, ctx):
         parser = PriorityOptionParser(ctx, self.PRIORITY_LIST, self.PRIORITY_ADJUSTMENTS)
@@ -290,23 +293,22 @@ class RequireNamed(Constraint):
     """Cloup constraint requiring the listed parameters"""
     def __init__(self, *names):
         self.names = names
+        # For membership tests; self.names keeps the order for messages
+        self.name_set = frozenset(names)
 
     def _format_names(self, names, ctx):
-        params = ctx.command.params
-        param_names = [p.name for p in params]
-        param_names = [format_param(params[param_names.index(name)])
-                       if name in param_names else name
-                       for name in names]
-        return prettyprint_list(param_names)
+        params = {p.name: p for p in ctx.command.params}
+        return prettyprint_list([format_param(params[name]) if name in params else name
+                                 for name in names])
 
     def help(self, ctx: click.Context) -> str:
         names = self._format_names(self.names, ctx)
         return f"{names} are required" if len(self.names) > 1 else f"{names} is required"
 
     def check_consistency(self, params):
-        param_names = set([param.name for param in params])
-        if not set(self.names) <= param_names:
-            missing = param_names - set(self.names)
+        param_names = {param.name for param in params}
+        if not self.name_set <= param_names:
+            missing = self.name_set - param_names
             reason = (
                 f"the constraint requires parameters {prettyprint_list(missing)}, "
                 f"which have not been declared"
@@ -314,9 +316,9 @@ class RequireNamed(Constraint):
             raise UnsatisfiableConstraint(self, params, reason)
 
     def check_values(self, params, ctx):
-        given = get_params_whose_value_is_set(params, ctx.params)
-        if not set(self.names) <= set([p.name for p in given]):
-            missing = [p for p in params if p not in given and p.name in self.names]
+        given = {p.name for p in get_params_whose_value_is_set(params, ctx.params)}
+        if not self.name_set <= given:
+            missing = [p for p in params if p.name not in given and p.name in self.name_set]
             raise ConstraintViolated(
                 f"the following parameters are required:\n"
                 f"{format_param_list(missing)}",
@@ -324,7 +326,7 @@ class RequireNamed(Constraint):
             )
 
     def is_required(self, param, ctx) -> None:
-        return param.name in self.names
+        return param.name in self.name_set
 
     def is_allowed(self, param, ctx) -> None:
         return True
@@ -443,10 +443,10 @@ def summarise_payload(cfg, payload):
         p(SEP)
         maybe_print(buf.getvalue(), pager=not cfg.no_prompt)
 
-SHARED_PRIORITY_ADJUSTMENTS = [
+SHARED_PRIORITY_ADJUSTMENTS = (
     ("token", "username", "password", "save_auth"),
-]
-SHARED_PRIORITY_LIST = ["root", "readme", "no_prompt", "quiet", "plugin"]
+)
+SHARED_PRIORITY_LIST = ("root", "readme", "no_prompt", "quiet", "plugin")
 
 class UploadCommand(PriorityProcessingCommand):
     PRIORITY_LIST = SHARED_PRIORITY_LIST
@@ -550,7 +550,7 @@ out to a non-command function because of https://github.com/pallets/click/issues
         save_cfg(cfg.auth, include_defaults=True)
 
 class UpdateCommand(PriorityProcessingCommand):
-    PRIORITY_LIST = SHARED_PRIORITY_LIST + ["url"]
+    PRIORITY_LIST = SHARED_PRIORITY_LIST + ("url",)
     PRIORITY_ADJUSTMENTS = SHARED_PRIORITY_ADJUSTMENTS
 
 @cli.command(epilog=CMD_EPILOGUE, cls=UpdateCommand)
@@ -564,7 +564,7 @@ def update(previous_payload, save, save_auth):
     upload_or_update(previous_payload=previous_payload, save=save, save_auth=save_auth)
 
 class LoginCommand(PriorityProcessingCommand):
-    PRIORITY_LIST = SHARED_PRIORITY_LIST + ["url"]
+    PRIORITY_LIST = SHARED_PRIORITY_LIST + ("url",)
     PRIORITY_ADJUSTMENTS = SHARED_PRIORITY_ADJUSTMENTS
 
 @cli.command(cls=LoginCommand)
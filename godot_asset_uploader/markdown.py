@@ -12,7 +12,7 @@ from validator_collection.checkers import is_url
 
 from . import config
 from .errors import GdAssetError
-from .util import is_interesting_link, normalise_video_link, is_image_link
+from .util import classify_link
 
 class MetaItem(SpanToken):
     def __init__(self, matches):
@@ -267,13 +267,9 @@ def get_asset_description(cfg: config.Config, prep_image_func=None, prep_link_fu
         previews.append({"type": "image", "link": prep_image_func(token.src)})
 
     def process_link(token):
-        if not is_interesting_link(token.target):
-            pass
-        elif (href := normalise_video_link(token.target)):
-            previews.append({"type": "video", "link": prep_image_func(href)})
-            return None
-        elif is_image_link(token.target):
-            previews.append({"type": "image", "link": prep_image_func(token.target)})
+        kind, href = classify_link(token.target)
+        if kind:
+            previews.append({"type": kind, "link": prep_image_func(href)})
             return None
         # All links will be converted to autolink syntax, since the asset
         # library doesn't support any form of markup whatsoever
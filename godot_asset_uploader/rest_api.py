@@ -1,6 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
-from itertools import dropwhile, islice, zip_longest, count
+from itertools import islice, zip_longest, count
 import re
+import threading
 
 import dirtyjson
 from validator_collection.checkers import is_integer, is_url
@@ -11,6 +13,24 @@ from .util import dict_merge, normalise_newlines
 from .errors import GdAssetError, HTTPRequestError
 
 OFFICIAL_LIBRARY_ROOT = URL("https://godotengine.org/")
+OFFICIAL_LIBRARY_HOST = OFFICIAL_LIBRARY_ROOT.host
+LIBRARY_API_URL = str(OFFICIAL_LIBRARY_ROOT / "asset-library" / "api")
+
+
+def make_session():
+    session = requests.Session()
+    session.headers.update({'Accept': 'application/json'})
+    return session
+
+
+# Shared session, so that consecutive API requests can reuse the same
+# connection instead of doing a new TCP & TLS handshake every time. Responses
+# are deliberately not cached, since we need to see the current state of the
+# asset when comparing and submitting edits
+SESSION = make_session()
+# requests.Session isn't guaranteed to be thread-safe, so worker threads doing
+# concurrent requests (see batch_get()) each get their own session in here
+THREAD_LOCAL = threading.local()
 # FIXME: This is not actually stated anywhere in the docs, but circumstancial
 # evidence suggests that categories and their ids are specific to the given
 # library. This will need refactoring if other libraries ever become a thing
@@ -85,10 +105,10 @@ def guess_asset_id(id_or_url):
     if is_url(id_or_url):
         parsed = URL(id_or_url)
         # Currently we're only supporting the official asset library
-        if parsed.scheme and parsed.host == OFFICIAL_LIBRARY_ROOT.host:
-            path = list(dropwhile(lambda x: x != "asset", parsed.parts))
-            if path and len(path) > 1:
-                prefix, id, *suffix = path
+        if parsed.scheme and parsed.host == OFFICIAL_LIBRARY_HOST:
+            parts = parsed.parts
+            if "asset" in parts and (rest := parts[parts.index("asset") + 1:]):
+                id, *suffix = rest
                 try:
                     return int(id) if not suffix else None
                 except ValueError:
@@ -96,12 +116,12 @@ def guess_asset_id(id_or_url):
     raise GdAssetError(f"{id_or_url} is not a valid asset ID or asset URL")
 
 def get_library_url(*path):
-    return str(OFFICIAL_LIBRARY_ROOT.joinpath(*["asset-library", "api"], *path))
+    return "/".join([LIBRARY_API_URL, *map(str, path)])
 
-def api_request(meth, *url, data=None, params=None, headers=None):
-    headers = headers or {}
-    headers.update({'Accept': 'application/json'})
-    resp = requests.request(meth, get_library_url(*url), data=data, headers=headers, params=params)
+def api_request(meth, *url, data=None, json=None, params=None, headers=None):
+    session = getattr(THREAD_LOCAL, "session", SESSION)
+    resp = session.request(meth, get_library_url(*url),
+                           data=data, json=json, headers=headers, params=params)
     try:
         resp.raise_for_status()
     except requests.HTTPError:
@@ -122,8 +142,25 @@ def api_request(meth, *url, data=None, params=None, headers=None):
 def GET(*url, params=None, headers=None):
     return api_request("get", *url, params=params, headers=headers)
 
-def POST(*url, data=None, params=None, headers=None):
-    return api_request("post", *url, data=data, params=params, headers=headers)
+def POST(*url, data=None, json=None, params=None, headers=None):
+    return api_request("post", *url, data=data, json=json, params=params, headers=headers)
+
+def batch_get(*urls, params=None, headers=None, max_workers=4):
+    """Perform GET requests for each of URLS concurrently, and return the results
+in the same order. Each element of URLS is a sequence of path segments, as would be
+passed to GET()"""
+    sessions = []
+
+    def init_worker():
+        THREAD_LOCAL.session = make_session()
+        sessions.append(THREAD_LOCAL.session)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, initializer=init_worker) as executor:
+            return list(executor.map(lambda url: GET(*url, params=params, headers=headers), urls))
+    finally:
+        for session in sessions:
+            session.close()
 
 def get_paginated(*url, params=None, headers=None, max_pages=None):
     result = []
@@ -147,13 +184,13 @@ asset. Edits will be merged with the original payload info."""
            for edit in get_paginated("asset", "edit", params={
                 "asset": guess_asset_id(asset_id), "status": "new in_review"
            })]
+    edits = batch_get(*[("asset", "edit", edit_id) for edit_id in ids])
     return [dict_merge(edit["original"],
                        # Need to normalise strings heavily because
                        # browser edits mangle things horribly
                        {k: v
                         for k, v in edit.items() if v is not None and k != "original"})
-            for edit_id in ids
-            for edit in [GET("asset", "edit", edit_id)]]
+            for edit in edits]
 
 
 def is_payload_same(payload, reference):
@@ -190,14 +227,23 @@ def is_payload_same_as_pending(payload, previous, pending):
                            {k: v for k, v in pending.items() if k in keys})
 
 
+# Keys from the existing asset which should not be carried over into the new
+# payload, since they're either derived by the library, or expected to change
+VOLATILE_PAYLOAD_KEYS = frozenset([
+    "download_commit", "version_string", "version",
+    "type", "category", "rating", "support_level", "searchable",
+    "author", "author_id", "modify_date",
+])
+# Keys which need special processing when merging
+SPECIAL_PAYLOAD_KEYS = frozenset(["previews"])
+# Keys from the existing asset which are not copied over verbatim
+EXCLUDED_PAYLOAD_KEYS = VOLATILE_PAYLOAD_KEYS | SPECIAL_PAYLOAD_KEYS
+
+
 def merge_asset_payload(new, old=None):
     old = old or {}
-    volatile = ["download_commit", "version_string", "version",
-                "type", "category", "rating", "support_level", "searchable",
-                "author", "author_id", "modify_date",]
-    special = ["previews"]
-    payload = {k: v for k, v in old.items() if k not in volatile + special}
-    payload.update({k: v for k, v in new.items() if k not in special})
+    payload = {k: v for k, v in old.items() if k not in EXCLUDED_PAYLOAD_KEYS}
+    payload.update({k: v for k, v in new.items() if k not in SPECIAL_PAYLOAD_KEYS})
 
     def calculate_preview(p_new, p_old):
         if p_new and p_old:
@@ -209,12 +255,11 @@ def merge_asset_payload(new, old=None):
             return {"operation": "delete",
                     "edit_preview_id": p_old["preview_id"]}
 
-        return dict(**{"enabled": True},
-                    **op,
-                    **{"type": p_new["type"],
-                       "link": p_new["link"],
-                       "thumbnail": p_new.get("thumbnail", p_new["link"])},
-                    )
+        return {"enabled": True,
+                **op,
+                "type": p_new["type"],
+                "link": p_new["link"],
+                "thumbnail": p_new.get("thumbnail", p_new["link"])}
 
     payload["previews"] = [calculate_preview(p_new, p_old)
                            for p_new, p_old in zip_longest(new.get("previews", []), old.get("previews", []))
@@ -235,10 +280,14 @@ the previews in, to work around bugs"""
 def upload_or_update_asset(cfg, json, workaround=True):
     json = dict(json)
     url = ("asset", json["asset_id"]) if "asset_id" in json else ("asset",)
+    json["token"] = cfg.auth.token
     if workaround:
         json.update(massage_previews_for_workaround(json.pop("previews", [])))
-    json["token"] = cfg.auth.token
-    POST(*url, data=json)
+        POST(*url, data=json)
+    else:
+        # Form encoding can't represent the nested previews, so send the
+        # payload as JSON
+        POST(*url, json=json)
 
 
 def update_cfg_from_payload(cfg, json):
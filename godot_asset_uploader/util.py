@@ -1,64 +1,145 @@
-import email
 from functools import lru_cache
 from itertools import islice
 import os
+import re
 import typing as t
 import shutil
 import sys, pdb, traceback
+from urllib.parse import unquote, unquote_plus
 
 from yarl import URL
 
-VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".webm", ".avi", ".ogv", ".ogg"}
-IMAGE_EXTS = {".jpg", ".png", ".webp", ".gif"}
+VIDEO_EXTS = frozenset({".mp4", ".mov", ".mkv", ".webm", ".avi", ".ogv", ".ogg"})
+IMAGE_EXTS = frozenset({".jpg", ".png", ".webp", ".gif"})
 
 YOUTUBE_URL = URL("https://youtube.com/watch")
+YOUTUBE_URL_TEMPLATE = "https://youtube.com/watch?v={id}"
+# Real video ids never need quoting, so they can go into the template as-is
+YOUTUBE_ID_REGEX = re.compile("[A-Za-z0-9_-]*")
+# Matches the usual, well-formed YouTube links in one go, with the video id in
+# whichever group matched. Anything more unusual goes through the general
+# parsing in normalise_youtube_link()
+YOUTUBE_LINK_REGEX = re.compile(
+    "(?i:https?://(?:(?:www|m)\\.)?)"
+    "(?:(?i:youtube\\.com)/(?:watch\\?v=(?P<query>[A-Za-z0-9_-]+)(?:[&#]|\\Z)"
+    "|(?:embed|v|e|live|shorts)/(?P<path>[A-Za-z0-9_-]+)/?(?:[?#]|\\Z))"
+    "|(?i:youtu\\.be)/(?P<short>[A-Za-z0-9_-]+)(?:#|\\Z))"
+)
 YOUTUBE_DOMAINS = ("youtube.com", "youtube-nocookie.com")
+YOUTUBE_ID_PATHS = frozenset({"watch", "embed"})
+YOUTUBE_ID_PATH_PREFIXES = ("watch/", "embed/", "v/", "e/", "live/", "shorts/")
+HTTP_SCHEMES = frozenset({"http", "https"})
 
 
+def ext_alternatives(exts):
+    return "|".join(re.escape(ext) for ext in sorted(exts))
+
+
+# Single-pass classification of a link path by its extension, instead of
+# testing every known extension in turn. The name of the matched group is the
+# media type.
+MEDIA_SUFFIX_REGEX = re.compile(
+    f"(?:(?P<image>{ext_alternatives(IMAGE_EXTS)})|(?P<video>{ext_alternatives(VIDEO_EXTS)}))\\Z",
+    re.IGNORECASE
+)
+
+# Fast path for the overwhelmingly common case of plain http(s) links, which
+# doesn't require parsing the URL at all
+HTTP_LINK_REGEX = re.compile("^https?://", re.IGNORECASE)
+# Generic URI syntax as per RFC 3986, appendix B. This is all we need for
+# classifying links, and is much cheaper than a full URL parse
+URL_REGEX = re.compile("^(?:([a-zA-Z][a-zA-Z0-9+.-]*):)?(?://([^/?#]*))?([^?#]*)(?:\\?([^#]*))?")
+
+
+def split_url(href):
+    "Split HREF into (SCHEME, NETLOC, PATH, QUERY), with SCHEME lowercased and PATH unquoted"
+    scheme, netloc, path, query = URL_REGEX.match(href).groups()
+    return ((scheme or "").lower(), netloc or "", unquote(path), query or "")
+
+
+# The link classifiers are pure, and the same links (badges, homepage, repo
+# URL) tend to recur throughout a README, so their results are cached
+@lru_cache(maxsize=1024)
 def is_interesting_link(href):
     "Return True if href is 'interesting', ie. might potentially point to preview media"
-    uri = URL(href)
-    if uri.scheme and uri.scheme not in ("http", "https"):
+    if HTTP_LINK_REGEX.match(href):
+        return True
+    scheme, _, path, _ = split_url(href)
+    if scheme and scheme not in HTTP_SCHEMES:
+        return False
+    # If we see an @, we assume it's an email, since GFM will
+    # parse and autolink it as an email
+    if not scheme and "@" in path:
         return False
-    if not uri.scheme:
-        _, maybe_email = email.utils.parseaddr(uri.path)
-        # If we see an @, we assume it's an email, since GFM will
-        # parse and autolink it as an email
-        if "@" in maybe_email:
-            return False
     return True
 
 
+def media_type(path):
+    "Return 'image' or 'video' if PATH has a known media extension, otherwise None"
+    match = MEDIA_SUFFIX_REGEX.search(path)
+    return match and match.lastgroup
+
+
+@lru_cache(maxsize=1024)
 def is_image_link(href):
-    uri = URL(href)
-    return uri.path and any(uri.path.lower().endswith(ext) for ext in IMAGE_EXTS)
+    return media_type(split_url(href)[2]) == "image"
+
+
+def query_value(query, key):
+    """Return the first value of KEY in the raw QUERY string, or None if it's not
+present. Cheaper than parsing the whole query when we only need one key"""
+    for part in query.split("&"):
+        name, _, value = part.partition("=")
+        if name == key:
+            return unquote_plus(value)
+    return None
+
 
+def youtube_watch_url(id):
+    "Return the canonical watch URL for the video ID"
+    if YOUTUBE_ID_REGEX.fullmatch(id):
+        return YOUTUBE_URL_TEMPLATE.format(id=id)
+    return str(YOUTUBE_URL.with_query(v=id))
 
+
+@lru_cache(maxsize=1024)
 def normalise_youtube_link(href):
-    uri = URL(href)
-    if uri.scheme and uri.scheme in ["http", "https"]:
-        path = uri.path.strip("/")
-        if any(uri.host.endswith(domain) for domain in YOUTUBE_DOMAINS):
-            if path == "oembed":
-                return "url" in uri.query and normalise_youtube_link(uri.query["url"])
-            if path in ("watch", "embed"):
-                return "v" in uri.query and str(YOUTUBE_URL.with_query(v=uri.query["v"]))
-            if any(path.startswith(f"{x}/") for x in ["watch", "embed", "v", "e", "live", "shorts"]):
-                return str(YOUTUBE_URL.with_query(v=path.split("/")[-1]))
+    if (match := YOUTUBE_LINK_REGEX.match(href)):
+        return YOUTUBE_URL_TEMPLATE.format(id=match[match.lastgroup])
+    # Links which resolve to another link (oembed) are handled by going around
+    # the loop again
+    while True:
+        scheme, netloc, path, query = split_url(href)
+        # Cheaply reject links that can't possibly be YouTube, which is nearly all of them
+        if scheme not in HTTP_SCHEMES or "youtu" not in netloc.lower():
+            return None
+        host = netloc.rpartition("@")[2].partition(":")[0].lower()
+        stripped = path.strip("/")
+        if host.endswith(YOUTUBE_DOMAINS):
+            if stripped == "oembed":
+                if (href := query_value(query, "url")) is None:
+                    return False
+                continue
+            if stripped in YOUTUBE_ID_PATHS:
+                id = query_value(query, "v")
+                return id is not None and youtube_watch_url(id)
+            if stripped.startswith(YOUTUBE_ID_PATH_PREFIXES):
+                return youtube_watch_url(stripped.split("/")[-1])
         # Special case: youtube accepts URLs of the form http://youtu.be/{id}&feature=channel,
         # which don't have a ? to mark the query string. But it also accepts
         # ones with proper ? present.
-        if uri.host.endswith("youtu.be"):
-            resolved = YOUTUBE_URL.with_query(f"v={uri.path[1:]}").update_query(uri.query)
-            return normalise_youtube_link(resolved)
-    return None
+        if host.endswith("youtu.be"):
+            if (id := query_value(query, "v")) is None:
+                id = query_value(f"v={path[1:]}", "v")
+            return youtube_watch_url(id)
+        return None
 
 
+@lru_cache(maxsize=1024)
 def normalise_video_link(href):
     if (out := normalise_youtube_link(href)):
         return out
-    uri = URL(href)
-    if uri.path and set(uri.suffixes) & VIDEO_EXTS:
+    if media_type(split_url(href)[2]) == "video":
         return href
     return None
 
@@ -67,8 +148,28 @@ def is_youtube_link(href):
     return normalise_youtube_link(href) is not None
 
 
+@lru_cache(maxsize=1024)
+def classify_link(href):
+    """Classify HREF as potential preview media in a single pass. Return a tuple
+(KIND, LINK), where KIND is 'image' or 'video', and LINK is the (possibly
+normalised) link to use, or (None, None) if HREF isn't a media link"""
+    if not is_interesting_link(href):
+        return (None, None)
+    if (out := normalise_youtube_link(href)):
+        return ("video", out)
+    if (kind := media_type(split_url(href)[2])):
+        return (kind, href)
+    return (None, None)
+
+
+@lru_cache(maxsize=1)
+def terminal_columns():
+    # We're a short-lived CLI process, so querying the terminal once is enough
+    return shutil.get_terminal_size().columns
+
+
 def terminal_width(max_width=100):
-    return min(shutil.get_terminal_size().columns, max_width)
+    return min(terminal_columns(), max_width)
 
 
 def debug_on_error():
@@ -84,7 +185,10 @@ def debug_on_error():
 
 
 def is_sequence(x):
-    return isinstance(x, t.Sequence) and not isinstance(x, (bytes, str))
+    # Check the concrete types first, since the ABC instance check is comparatively slow
+    return isinstance(x, (list, tuple)) or (
+        isinstance(x, t.Sequence) and not isinstance(x, (bytes, str))
+    )
 
 
 def ensure_tuple(x):
@@ -99,21 +203,25 @@ def ensure_sequence(x):
 
 def dict_merge(d1, d2):
     "Like d1.update(d2), but returns a new dict"
-    return {k: d2.get(k, d1.get(k)) for k in set(d1) | set(d2)}
+    return {**d1, **d2}
 
 
-def batched(iterable, n):
-    # batched('ABCDEFG', 3) → ABC DEF G
-    if n < 1:
-        raise ValueError('n must be at least one')
-    iterator = iter(iterable)
-    while batch := tuple(islice(iterator, n)):
-        yield batch
+try:
+    # Python 3.12+ has this built in, implemented in C
+    from itertools import batched
+except ImportError:
+    def batched(iterable, n):
+        # batched('ABCDEFG', 3) → ABC DEF G
+        if n < 1:
+            raise ValueError('n must be at least one')
+        iterator = iter(iterable)
+        while batch := tuple(islice(iterator, n)):
+            yield batch
 
 
 def normalise_newlines(string):
     "Normalise \r and \r\n to \n"
-    return "\n".join(string.splitlines())
+    return string.replace("\r\n", "\n").replace("\r", "\n")
 
 
 def prettyprint_list(elems, sep1=" and ", sep2=", ", sep3=", and "):
@@ -132,16 +240,21 @@ def prettyprint_list(elems, sep1=" and ", sep2=", ", sep3=", and "):
 
 
 @lru_cache
+def get_base_types(spec):
+    """Return a flat tuple of the plain types matched by SPEC (a type annotation,
+or a tuple of them), with Unions expanded and generics reduced to their origin"""
+    result = []
+    for T in ensure_tuple(spec):
+        origin = t.get_origin(T)
+        if origin == t.Union:
+            result.extend(get_base_types(t.get_args(T)))
+        else:
+            result.append(origin or T)
+    return tuple(result)
+
+
 def is_typed_as(spec, x):
     """Return True if X (a type) matches SPEC (a type annotation). SPEC
 can either be a simple type itself, or a more complicated construct,
 such as Optional[Dict[str,int]]"""
-    def get_base_type(T):
-        origin = t.get_origin(T)
-        if origin == t.Union:
-            return t.get_args(T)
-        if origin:
-            return origin
-        return T
-
-    return issubclass(x, tuple([get_base_type(T) for T in ensure_tuple(spec)]))
+    return issubclass(x, get_base_types(spec))
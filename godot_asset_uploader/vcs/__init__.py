@@ -1,28 +1,81 @@
-from itertools import chain
+from functools import lru_cache
+from importlib import import_module
+import os
 from pathlib import Path
+import shutil
 from string import Template
+import sys
 
-import giturlparse
 from yarl import URL
 
 from .. import config
 from ..errors import GdAssetError, NoImplementationError
 
-from .providers import RepoProvider, remote_to_https
-from . import git, hg
+from .providers import (
+    RepoProvider, PROVIDER_HOSTS, match_provider_remote, parse_remote, remote_to_https,
+)
 
-IMPLS = [hg, git]
+# The backends pull in dulwich and hglib, which are comparatively slow to
+# import, so they're only loaded by get_impls() once something needs them
+IMPLS = None
 
 
-GITHUB_BASE_CONTENT_URL = URL("https://raw.githubusercontent.com/$owner/$repo/$commit/")
+def get_impls():
+    """Return the list of VCS backend modules to probe, importing them on first use.
+Without the hg executable, hglib can't do anything, so in that case Mercurial is
+left out entirely (and its backend is never imported)"""
+    global IMPLS
+    if IMPLS is None:
+        # Same check as hg.has_hg_executable(), but without importing hg
+        names = ["hg", "git"] if shutil.which("hg") else ["git"]
+        IMPLS = [import_module(f".{name}", __name__) for name in names]
+    return IMPLS
+
+
+GITHUB_BASE_CONTENT_URL = Template("https://raw.githubusercontent.com/$owner/$repo/$commit/")
 # FIXME: This is probably wrong in some cases, since GitLab has much more
 # complicated ways of grouping repos with multiple levels of hierarchy
-GITLAB_BASE_CONTENT_URL = URL("https://$host/$owner/$repo/-/raw/$commit/")
+GITLAB_BASE_CONTENT_URL = Template("https://$host/$owner/$repo/-/raw/$commit/")
 
 
 def dir_and_parents(path):
-    path = Path(path)
-    return chain([path] if path.is_dir() else [], path.parents)
+    """Yield PATH (if it's a directory) and then all its parents, as strings. This
+walks the same directories as Path.parents, but without building a Path for
+each of them"""
+    path = str(Path(path))
+    if os.path.isdir(path):
+        yield path
+    while (parent := os.path.dirname(path) or ".") != path:
+        yield parent
+        path = parent
+
+
+# Which VCS (if any) has a repo at a given directory, keyed by the resolved
+# directory path. Every dispatcher goes through guess_vcs_type(), so without
+# this the same ancestors get probed over and over during a single run
+VCS_PROBE_CACHE = {}
+
+
+def invalidate_vcs_cache():
+    "Forget all cached VCS probes, e.g. after creating or removing a repo"
+    VCS_PROBE_CACHE.clear()
+    if (hg := sys.modules.get(f"{__name__}.hg")):
+        hg.find_repo_root.cache_clear()
+
+
+def probe_vcs(dir):
+    "Return the VCS implementation with a repo at DIR (not its parents), or None"
+    try:
+        return VCS_PROBE_CACHE[dir]
+    except KeyError:
+        pass
+    impl = next((impl for impl in get_impls() if impl.has_repo(dir)), None)
+    VCS_PROBE_CACHE[dir] = impl
+    return impl
+
+
+def resolved_dir_and_parents(path):
+    return dir_and_parents(Path(path).resolve())
 
 
 def get_project_root(path):
@@ -33,19 +86,17 @@ A "project root" is defined as repository in a supported format
 (currently, Git or Mercurial), OR a directory containing
 'gdasset.ini'. If multiple candidates for the root exist, the closest
 one (ie. fewest levels up the directory tree) will be picked."""
-    for dir in dir_and_parents(path):
-        if config.has_config_file(dir) or any(impl.has_repo(dir) for impl in IMPLS):
-            return dir
+    for dir in resolved_dir_and_parents(path):
+        if config.has_config_file(dir) or probe_vcs(dir):
+            return Path(dir)
 
 
 def guess_vcs_type(path):
     """Return a tuple of (vcs_type: str, root: Path) if a known VCS has
 been detected, starting at PATH and going up the parent chain"""
-    path = Path(path)
-    for dir in dir_and_parents(path):
-        for impl in IMPLS:
-            if impl.has_repo(path):
-                return (impl, path)
+    for dir in resolved_dir_and_parents(path):
+        if (impl := probe_vcs(dir)):
+            return (impl, Path(dir))
     return (None, None)
 
 
@@ -58,76 +109,80 @@ whatever VCS is closest (currently Git and Mercurial are supported)."""
     return None
 
 
-def dispatch_vcs(meth, error_detail, docstring=None):
-    def dispatch(root, *args, **kwargs):
-        try:
-            vcs_type, root = guess_vcs_type(root)
-            if not vcs_type:
-                return None
-            return getattr(vcs_type, meth)(root, *args, **kwargs)
-        except KeyError:
-            raise NotImplementedError(
-                f"{error_detail} for {vcs_type} not implemented"
-            )
-
-    if docstring is not None:
-        dispatch.__doc__ = docstring
-    return dispatch
-
+def dispatch_vcs(meth, impls, error_detail, docstring=None):
+    # IMPLS are backend names rather than modules, so that the backends can be
+    # imported lazily. Each method is looked up once, on first use
+    methods = {}
 
-def dispatch_url(guessers, docstring=None):
-    def dispatch(url, *args, **kwargs):
-        for guesser in guessers:
-            if (cand := guesser(url, *args, **kwargs)):
-                return cand
-        return None
+    def dispatch(root, *args, **kwargs):
+        vcs_type, root = guess_vcs_type(root)
+        if not vcs_type:
+            return None
+        if (method := methods.get(vcs_type)) is None:
+            if vcs_type.__name__.rpartition(".")[2] not in impls:
+                raise NoImplementationError(
+                    f"{error_detail} for {vcs_type} not implemented"
+                )
+            method = methods[vcs_type] = getattr(vcs_type, meth)
+        return method(root, *args, **kwargs)
 
     if docstring is not None:
         dispatch.__doc__ = docstring
     return dispatch
 
 
-guess_commit = dispatch_vcs("guess_commit", [git, hg], "Head commit extraction")
+guess_commit = dispatch_vcs("guess_commit", ["git", "hg"], "Head commit extraction")
 
-guess_repo_url = dispatch_vcs("guess_repo_url", [git, hg], "Repo URL detection")
+guess_repo_url = dispatch_vcs("guess_repo_url", ["git", "hg"], "Repo URL detection")
 
 
 # NOTE: Mercurial providers are handled here as well. The biggest hosted provider
-# for Hg is Heptapod, which is a fork of GitLab and will be detected as such
+# for Hg is Heptapod, which is a fork of GitLab and will be detected as such.
+# The URL guessers are pure functions of the remote URL, and get called for the
+# same remote over and over while processing the description, hence the caching
+@lru_cache(maxsize=64)
 def guess_repo_provider(url):
-    parsed = giturlparse.parse(url or "")
+    if (match := match_provider_remote(url)):
+        return PROVIDER_HOSTS[match["url_host"] or match["scp_host"]]
+    parsed = parse_remote(url)
     platform = (parsed.platform if parsed else "").upper()
     if platform == "GITLAB" and "heptapod.net" in parsed.host:
         return RepoProvider.HEPTAPOD
     return url and RepoProvider.__members__.get(platform, RepoProvider.CUSTOM)
 
 
+def join_url(base, *parts):
+    """Append PARTS to the path of BASE. This is only meant for the well-formed
+URLs produced by remote_to_https(), which don't need the full parsing and
+quoting that yarl would do"""
+    return "/".join([base.rstrip("/"), *parts])
+
+
+@lru_cache(maxsize=64)
 def guess_issues_url(url):
     "Try to guess the issues URL based on the remote repo URL"
     provider = guess_repo_provider(url)
     if provider in [
             RepoProvider.GITHUB, RepoProvider.GITLAB, RepoProvider.BITBUCKET, RepoProvider.HEPTAPOD
     ]:
-        return str(URL(remote_to_https(url)) / "issues")
+        return join_url(remote_to_https(url), "issues")
     return None
 
 
+@lru_cache(maxsize=64)
 def guess_download_url(url, commit):
     "Try to guess the download URL based on the remote repo URL"
     provider = guess_repo_provider(url)
-    url = URL(remote_to_https(url) or url)
+    url = remote_to_https(url) or url
     if provider in [RepoProvider.GITHUB, RepoProvider.GITLAB]:
-        url = url / "archive" / f"{commit}.zip"
+        return join_url(url, "archive", f"{commit}.zip")
     elif provider == RepoProvider.HEPTAPOD:
         # FIXME: I don't know if the "-" is always valid, I don't fully
         # understand its role in GitLab URLs
-        url = url / "-" / "archive" / commit / f"{commit}.zip"
+        return join_url(url, "-", "archive", commit, f"{commit}.zip")
     elif provider == RepoProvider.BITBUCKET:
-        url = url / "get" / f"{commit}.zip"
-    else:
-        return None
-
-    return str(url)
+        return join_url(url, "get", f"{commit}.zip")
+    return None
 
 
 # FIXME: This assumes git
@@ -141,7 +196,7 @@ being generated from. I.e. if the links are resolved for docs/dev/README.md, the
 the offset would be "docs/dev", and the resulting URL would become
 https://raw.githubusercontent.com/owner/repo/commit/docs/dev/relative/path"""
     provider = guess_repo_provider(provider_url)
-    parsed = giturlparse.parse(provider_url or "")
+    parsed = parse_remote(provider_url)
     if provider == RepoProvider.GITHUB:
         base_url = GITHUB_BASE_CONTENT_URL
     elif provider == RepoProvider.BITBUCKET:
@@ -152,7 +207,7 @@ https://raw.githubusercontent.com/owner/repo/commit/docs/dev/relative/path"""
         base_url = GITLAB_BASE_CONTENT_URL
     else:
         raise GdAssetError(f"Unexpected repo provider '{provider}', this is a bug")
+    base_url = URL(base_url.safe_substitute(**parsed.data, host=parsed.host, commit=commit))
     if path_offset:
         base_url = base_url / path_offset
-    template = Template(str(base_url / relative_path))
-    return template.safe_substitute(**parsed.data, host=parsed.host, commit=commit)
+    return str(base_url / relative_path)
@@ -1,19 +1,22 @@
+from pathlib import Path
+
 from dulwich.repo import Repo as GitRepo
 import dulwich.porcelain as git
-from dulwich.errors import NotGitRepository
 
 from ..errors import BadRepoError
 from .providers import remote_to_https
 
 
 def has_repo(path):
-    try:
-        repo = GitRepo(path)
-        if repo.bare:
-            raise BadRepoError(repo_type="git", path=path, details="Bare repos are not supported")
+    # Opening the repo just to check if it's there is comparatively
+    # expensive, so instead apply the same layout checks dulwich's Repo uses
+    # to detect regular (.git file or dir) and bare repos
+    path = Path(path)
+    if (control := path / ".git").is_file() or (control / "objects").is_dir():
         return True
-    except NotGitRepository:
-        return False
+    if (path / "objects").is_dir() and (path / "refs").is_dir():
+        raise BadRepoError(repo_type="git", path=path, details="Bare repos are not supported")
+    return False
 
 
 def get_repo(path):
@@ -21,28 +24,28 @@ def get_repo(path):
     return GitRepo(path)
 
 
-def get_branch_remote(repo):
+def get_branch_remote(repo, config=None):
     """Like dulwich.porcelain.get_branch_remote(), but tries harder to figure out what
 the remote is if the current branch doesn't have a remote set (remotes are
 normally assigned on a per-branch basis). This happens with Magit for example,
 where pushDefault will be taken into account in the absence of per-branch
 remote, so the UI will show a remote branch, but dulwich will return nothing
-when asked for the remote."""
-    with git.open_repo_closing(repo) as r:
-        branch_name = git.active_branch(r.path)
-        config = r.get_config()
-        for section, key in [
-                ((b"branch", branch_name), b"remote"),
-                ((b"branch", branch_name), b"pushRemote"),
-                ((b"remote",), b"pushDefault"),
-        ]:
-            try:
-                remote_name = config.get(section, key)
-                break
-            except KeyError:
-                continue
-        else:
-            remote_name = b"origin"
+when asked for the remote.
+
+REPO must be an already open repo. If CONFIG is given, it should be the
+already loaded config of REPO, which saves reading it again."""
+    branch_name = git.active_branch(repo)
+    if config is None:
+        config = repo.get_config()
+    # Probe the sections first rather than letting config.get() raise for
+    # every missing key, which is the common case
+    branch_section = (b"branch", branch_name)
+    branch = config[branch_section] if config.has_section(branch_section) else {}
+    remote = config[(b"remote",)] if config.has_section((b"remote",)) else {}
+    remote_name = (
+        branch.get(b"remote") or branch.get(b"pushRemote") or remote.get(b"pushDefault")
+        or b"origin"
+    )
     return remote_name
 
 
@@ -50,7 +53,7 @@ def get_remote_repo(repo, remote_location=None):
     "dulwich.porcelain.get_remote_repo(), modified to use get_branch_remote()"
     config = repo.get_config()
     if remote_location is None:
-        remote_location = get_branch_remote(repo)
+        remote_location = get_branch_remote(repo, config)
     if isinstance(remote_location, str):
         encoded_location = remote_location.encode()
     else:
@@ -70,12 +73,12 @@ def get_remote_repo(repo, remote_location=None):
 
 
 def guess_commit(root):
-    with git.open_repo_closing(root) as repo:
+    with GitRepo(root) as repo:
         return repo.head().decode()
 
 
 def guess_repo_url(root):
-    with git.open_repo_closing(root) as repo:
+    with GitRepo(root) as repo:
         remote, url = get_remote_repo(repo)
         # Due to how dulwich returns the remote info, if a reasonable remote
         # wasn't found, the URL will be something nonsensical like "origin"
@@ -1,15 +1,20 @@
-from functools import lru_cache
-from itertools import chain
+import atexit
+from functools import lru_cache, wraps
+import os
 from pathlib import Path
 import shutil
 
-import decorators
 import hglib
 
 from ..errors import DependencyMissingError
 from .providers import remote_to_https
 
 
+# The [paths] entries the remote URL is taken from, in order of preference
+DEFAULT_PUSH_PATH = b"default-push"
+DEFAULT_PATH = b"default"
+
+
 def b_(val):
     "Make value a bytes-like object that can be passed to hg"
     if isinstance(val, (bytes, bytearray)):
@@ -35,9 +40,11 @@ def has_hg_executable():
     return shutil.which("hg")
 
 
-class ensure_hg_executable(decorators.FuncDecorator):
-    "Decorator to simplify making sure we don't try to invoke hglib if hg executable is not present"
-    def decorate(self, func, error=False, fallback=None):
+def ensure_hg_executable(func=None, *, error=False, fallback=None):
+    """Decorator to simplify making sure we don't try to invoke hglib if hg executable is
+not present. Can be used either bare, or called with ERROR and FALLBACK options"""
+    def decorate(func):
+        @wraps(func)
         def wrapper(*args, **kwargs):
             if not has_hg_executable():
                 if error:
@@ -47,24 +54,48 @@ class ensure_hg_executable(decorators.FuncDecorator):
 
         return wrapper
 
+    return decorate(func) if func else decorate
+
+
+@lru_cache(maxsize=256)
+def find_repo_root(path):
+    """Return the root of the hg repo containing PATH (an absolute path string), or
+None. The cache is keyed on PATH as given, so repeated lookups don't even need to
+resolve it"""
+    path = str(Path(path).resolve())
+    while True:
+        if os.path.isdir(os.path.join(path, ".hg")):
+            return path
+        if (parent := os.path.dirname(path)) == path:
+            return None
+        path = parent
+
+
+def close_client(client):
+    "Shut down CLIENT's command server, unless it's been closed already"
+    if client.server is not None:
+        client.close()
+
+
+@lru_cache(maxsize=32)
+def open_client(root):
+    """Open a command server client for the repo at ROOT, shared by everything under it.
+The client stays open for the rest of the run, and is shut down at exit"""
+    client = hglib.open(b_(root))
+    atexit.register(close_client, client)
+    return client
 
-CLIENTS = {}
 
 @ensure_hg_executable(error=True)
 def get_client_for(path):
     "Caching version of hglib.open()"
-    path = Path(path)
-    if path not in CLIENTS:
-        client = hglib.open(b_(path))
-        root = Path(s_(client.root()))
-        for dir in chain([path], path.parents):
-            CLIENTS[dir] = client
-            if dir == root:
-                break
-    return CLIENTS[path]
-
-
-@ensure_hg_executable(fallback=False)
+    path = os.path.abspath(path)
+    # If there's no repo, let hglib.open() raise the same error it always did
+    return open_client(find_repo_root(path) or path)
+
+
+# Not guarded by ensure_hg_executable, since vcs.get_impls() doesn't include hg
+# at all when the executable is missing, so this is never probed in that case
 def has_repo(path):
     # Note: originally, this code used get_client_for(), but this is very slow
     # in testing. Pytest defeats our caching attempts, and trying to open a
@@ -91,7 +122,9 @@ def guess_commit(root):
 
 def guess_repo_url(root):
     client = get_repo(root)
-    for cand in ["default-push", "default"]:
-        if b_(cand) in client.paths():
-            return remote_to_https(s_(client.paths()[b_(cand)]))
+    # Every paths() call is a round-trip to the command server
+    paths = client.paths()
+    for cand in [DEFAULT_PUSH_PATH, DEFAULT_PATH]:
+        if cand in paths:
+            return remote_to_https(s_(paths[cand]))
     return None
@@ -1,17 +1,21 @@
 from enum import Enum
-
-import giturlparse
-from yarl import URL
+from functools import lru_cache
+import re
 
 
 class StrEnum(str, Enum):
     @classmethod
     def _missing_(cls, value):
-        value = value.upper()
-        for member in cls:
-            if member.name == value:
-                return member
-        return None
+        # The index has to be built lazily, since the members don't exist yet
+        # while the enum class itself is being created. It also has the names
+        # in lowercase (the way giturlparse reports platforms), so the common
+        # spellings are found without having to upper-case the value first
+        if "_name_index" not in cls.__dict__:
+            cls._name_index = {
+                alias: member for member in cls
+                for alias in (member.name.lower(), member.name.upper())
+            }
+        return cls._name_index.get(value) or cls._name_index.get(value.upper())
 
     def __new__(cls, name, normalised=None):
         member = str.__new__(cls, name)
@@ -28,10 +32,56 @@ class RepoProvider(StrEnum):
     HEPTAPOD = "Heptapod", "GitLab"
 
 
+PROVIDER_HOSTS = {
+    "github.com": RepoProvider.GITHUB,
+    "gitlab.com": RepoProvider.GITLAB,
+    "bitbucket.org": RepoProvider.BITBUCKET,
+}
+# Plain owner/repo remotes on the big public hosts, either as URLs or in the
+# scp-like git@host:owner/repo form. These can be identified and normalised from
+# the host alone, without going through giturlparse
+PROVIDER_REMOTE_REGEX = re.compile(
+    "(?:(?:https?|ssh|git)://(?:[^@/]+@)?(?P<url_host>{hosts})/"
+    "|(?:[^@/:]+@)?(?P<scp_host>{hosts}):)"
+    "(?P<owner>[\\w.-]+)/(?P<repo>[\\w.-]+?)(?:\\.git)?/?\\Z".format(
+        hosts="|".join(re.escape(host) for host in PROVIDER_HOSTS)
+    )
+)
+# The https:// URLs giturlparse produces for the hosts above, minus the .git
+PROVIDER_HTTPS_TEMPLATES = {
+    RepoProvider.GITHUB: "https://{host}/{owner}/{repo}",
+    RepoProvider.GITLAB: "https://{host}/{owner}/{repo}",
+    # BitBucket wants the owner as the user as well
+    RepoProvider.BITBUCKET: "https://{owner}@{host}/{owner}/{repo}",
+}
+
+
+def match_provider_remote(url):
+    "Match URL against PROVIDER_REMOTE_REGEX, returning None if it's not a plain remote"
+    return PROVIDER_REMOTE_REGEX.match(url) if url else None
+
+
+@lru_cache(maxsize=64)
+def parse_remote(url):
+    """Like giturlparse.parse(), but cached, since the same remote URL gets parsed
+repeatedly by the various guessers. The result must not be modified"""
+    # Imported here, since plain remotes on the big hosts are handled without
+    # it, so a typical run never needs to pay for importing it
+    import giturlparse
+    return giturlparse.parse(url or "")
+
+
+@lru_cache(maxsize=64)
 def remote_to_https(url):
     "Normalise remote URL so that it's always a https:// URL, if it's a known provider"
-    parsed = giturlparse.parse(url or "")
+    if (match := match_provider_remote(url)):
+        host = match["url_host"] or match["scp_host"]
+        return PROVIDER_HTTPS_TEMPLATES[PROVIDER_HOSTS[host]].format(
+            host=host, owner=match["owner"], repo=match["repo"]
+        )
+    parsed = parse_remote(url)
     url = parsed.valid and parsed.url2https
     # Annoyingly, giturlparse always adds .git, so now we have to get rid of it
-    url = url and str(URL(url).with_suffix(""))
+    if url and url.endswith(".git"):
+        url = url[:-len(".git")]
     return url if parsed.valid else None
@@ -0,0 +1,13 @@
+import sys
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fresh_vcs_cache():
+    # Repos are created fresh in temporary dirs for every test, so make sure
+    # nothing probed by an earlier test leaks into the next one. There's no
+    # need to import the VCS code just for that if the test doesn't use it
+    if (vcs := sys.modules.get("godot_asset_uploader.vcs")):
+        vcs.invalidate_vcs_cache()
+    yield
@@ -0,0 +1,6 @@
+PRETTYPRINT_INPUTS = [
+    (["foo"                       ], "{}"                 ),
+    (["foo", "bar"                ], "{} and {}"          ),
+    (["foo", "bar", "baz"         ], "{}, {}, and {}"     ),
+    (["foo", "bar", "baz", "quux" ], "{}, {}, {}, and {}" ),
+]
@@ -3,7 +3,7 @@ import pytest
 from godot_asset_uploader.cli import (
     RequireNamed,
 )
-from test_util import PRETTYPRINT_INPUTS
+from prettyprint_inputs import PRETTYPRINT_INPUTS
 
 @pytest.mark.parametrize("input, expected_output", PRETTYPRINT_INPUTS)
 def test_require_named_constraint(mocker, input, expected_output):
@@ -1,7 +1,7 @@
 from contextlib import nullcontext
 import pytest
 
-import yaml
+from pytest_regressions.data_regression import RegressionYamlDumper
 from yarl import URL
 
 from godot_asset_uploader.errors import NoImplementationError
@@ -11,23 +11,24 @@ from godot_asset_uploader.markdown import (
     get_asset_description
 )
 
-@pytest.fixture(autouse=True)
-def hack_pyyaml_multiline_strings():
-    # This is a pretty ugly hack, but it's needed to make PyYAML use
-    # "literal style block scalars", ie. the readable representation
-    # of multiline strings.
-    # Copied mostly from https://stackoverflow.com/a/15423007/339482
-    def represent_scalar(self, tag, value, style=None):
-        style = "|" if "\n" in value else style
-        node = yaml.representer.ScalarNode(tag, value, style=style)
-        if self.alias_key is not None:
-            self.represented_objects[self.alias_key] = node
-        return node
-
-    old_represent_scalar = yaml.representer.BaseRepresenter.represent_scalar
-    yaml.representer.BaseRepresenter.represent_scalar = represent_scalar
-    yield
-    yaml.representer.BaseRepresenter.represent_scalar = old_represent_scalar
+
+def represent_str(dumper, value):
+    # Make PyYAML use "literal style block scalars", ie. the readable
+    # representation of multiline strings, in the regression files
+    style = "|" if "\n" in value else None
+    return dumper.represent_scalar("tag:yaml.org,2002:str", value, style=style)
+
+
+RegressionYamlDumper.add_representer(str, represent_str)
+
+# Most links in the test documents are plain http(s) ones, which are absolute
+# without needing to parse them
+ABSOLUTE_PREFIXES = ("http://", "https://")
+
+
+def is_absolute(url):
+    return url.startswith(ABSOLUTE_PREFIXES) or URL(url).absolute
+
 
 @pytest.mark.parametrize("changelog", [
     "CHANGELOG-long.md",
@@ -53,14 +54,14 @@ def test_get_asset_description(request, data_regression, datadir, readme, change
     cfg = Config(root=datadir, readme=readme, changelog=changelog)
 
     def prep_image_url(url):
-        if not URL(url).absolute:
+        if not is_absolute(url):
             return vcs.resolve_with_base_content_url(
                 repo_url, "12345deadbeef7890", url, path_offset=path_offset
             )
         return url
 
     def prep_link_url(url):
-        if not URL(url).absolute:
+        if not is_absolute(url):
             return vcs.resolve_with_base_url(repo_url, url, cfg.commit)
         return url
 
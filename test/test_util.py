@@ -5,10 +5,12 @@ import pytest
 
 from godot_asset_uploader.util import (
     VIDEO_EXTS,
-    is_interesting_link, is_image_link, normalise_video_link,
+    is_interesting_link, is_image_link, normalise_video_link, classify_link,
     prettyprint_list,
 )
 
+from prettyprint_inputs import PRETTYPRINT_INPUTS
+
 YOUTUBE_CANONICAL_URL = "https://youtube.com/watch?v={id}"
 
 YOUTUBE_SUPPORTED_URLS = (
@@ -229,15 +231,19 @@ YOUTUBE_UNSUPPORTED_URLS = (
 )
 
 
+# Seeded, so that a failure can be reproduced by just re-running the tests
+RANDOM = random.Random(0x6d617468)
+
+
 def alnum_string(length):
-    return ''.join(random.choice(
+    return ''.join(RANDOM.choice(
         string.ascii_uppercase + string.ascii_lowercase + string.digits
     ) for _ in range(length))
 
 
 def random_paths(*exts):
-    path = "/".join([alnum_string(random.randint(4, 10))
-                     for _ in range(random.randint(1, 3))])
+    path = "/".join([alnum_string(RANDOM.randint(4, 10))
+                     for _ in range(RANDOM.randint(1, 3))])
     for ext in exts:
         yield f"{path}{ext}"
 
@@ -247,26 +253,22 @@ VIDEO_FILE_PATHS = list(random_paths(".mp4", ".mov", ".mkv", ".webm", ".avi", ".
 OTHER_FILE_PATHS = list(random_paths(".txt", ".html", ".json", ""))
 
 
-def random_url_parts():
-    for scheme in SCHEMES:
-        for domain in DOMAINS:
-            for query in QUERIES:
-                yield (scheme, domain, query)
-
-
 SCHEMES = ["ftp", "http", "https"]
 DOMAINS = [
     f"{alnum_string(4)}.{alnum_string(10)}.{tld}" for _ in range(5)
     for tld in [".com", ".org", ".co.uk", ".pl", ".xyz"]
 ]
 QUERIES = ["", "?foo=bar", "?foo=bar&baz=quux"]
+URL_PARTS = tuple(
+    (scheme, domain, query) for scheme in SCHEMES for domain in DOMAINS for query in QUERIES
+)
 
 
 # NB: is_interesting_link() doesn't care what the link is to, just
 # that it's a regular http(s) link
 @pytest.mark.parametrize("path", IMAGE_FILE_PATHS + VIDEO_FILE_PATHS + OTHER_FILE_PATHS)
 def test_is_interesting_link(path):
-    for scheme, domain, query in random_url_parts():
+    for scheme, domain, query in URL_PARTS:
         url = f"{scheme}://{domain}/{path}{query}"
         if scheme != "ftp":
             assert is_interesting_link(url)
@@ -280,22 +282,26 @@ def test_is_interesting_link(path):
 
 @pytest.mark.parametrize("path", IMAGE_FILE_PATHS)
 def test_is_image_link(path):
-    for scheme, domain, query in random_url_parts():
+    for scheme, domain, query in URL_PARTS:
         assert is_image_link(f"{scheme}://{domain}/{path}{query}")
 
 
 @pytest.mark.parametrize("path", OTHER_FILE_PATHS)
 def test_is_not_image_link(path):
-    for scheme, domain, query in random_url_parts():
+    for scheme, domain, query in URL_PARTS:
         assert not is_image_link(f"{scheme}://{domain}/{path}{query}")
 
 
-def test_normalise_youtube_link():
+@pytest.mark.parametrize("path", IMAGE_FILE_PATHS)
+def test_is_not_image_link_trailing_newline(path):
+    assert not is_image_link(f"{path}\n")
+
+
+@pytest.mark.parametrize("link", YOUTUBE_SUPPORTED_URLS)
+def test_normalise_youtube_link(link):
     video_id = alnum_string(12)
     canonical = YOUTUBE_CANONICAL_URL.format(id=video_id)
-
-    for link in YOUTUBE_SUPPORTED_URLS:
-        assert normalise_video_link(link.format(id=video_id)) == canonical
+    assert normalise_video_link(link.format(id=video_id)) == canonical
 
 
 def test_normalise_youtube_link_unsupported():
@@ -306,24 +312,31 @@ def test_normalise_youtube_link_unsupported():
 
 @pytest.mark.parametrize("path", VIDEO_FILE_PATHS)
 def test_normalise_video_link(path):
-    for scheme, domain, query in random_url_parts():
+    for scheme, domain, query in URL_PARTS:
         url = f"{scheme}://{domain}/{path}{query}"
         assert normalise_video_link(url) == url
 
 
 @pytest.mark.parametrize("path", OTHER_FILE_PATHS)
 def test_normalise_video_link_not_video(path):
-    for scheme, domain, query in random_url_parts():
+    for scheme, domain, query in URL_PARTS:
         url = f"{scheme}://{domain}/{path}{query}"
         assert normalise_video_link(url) is None
 
 
-PRETTYPRINT_INPUTS = [
-    (["foo"                       ], "{}"                 ),
-    (["foo", "bar"                ], "{} and {}"          ),
-    (["foo", "bar", "baz"         ], "{}, {}, and {}"     ),
-    (["foo", "bar", "baz", "quux" ], "{}, {}, {}, and {}" ),
-]
+def test_classify_link():
+    video_id = alnum_string(12)
+    canonical = YOUTUBE_CANONICAL_URL.format(id=video_id)
+    for link in YOUTUBE_SUPPORTED_URLS:
+        assert classify_link(link.format(id=video_id)) == ("video", canonical)
+    for scheme, domain, query in URL_PARTS:
+        for paths, kind in [(IMAGE_FILE_PATHS, "image"), (VIDEO_FILE_PATHS, "video")]:
+            for path in paths:
+                url = f"{scheme}://{domain}/{path}{query}"
+                assert classify_link(url) == ((kind, url) if scheme != "ftp" else (None, None))
+        for path in OTHER_FILE_PATHS:
+            assert classify_link(f"{scheme}://{domain}/{path}{query}") == (None, None)
+    assert classify_link(f"{alnum_string(10)}@domain") == (None, None)
 
 
 @pytest.mark.parametrize("input, expected_output", [([], "")] + PRETTYPRINT_INPUTS)
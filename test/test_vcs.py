@@ -1,7 +1,7 @@
 import pytest
 
 from godot_asset_uploader.vcs import (
-    guess_repo_provider, guess_issues_url, guess_download_url,
+    RepoProvider, guess_repo_provider, guess_issues_url, guess_download_url,
 )
 
 from vcs_urls import (
@@ -24,3 +24,19 @@ def test_provider_url(expected):
         assert guess_repo_provider(url) == expected.provider
         assert guess_issues_url(url) == expected.issues_url
         assert guess_download_url(url, expected.commit) == expected.download_url
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("GitHub", RepoProvider.GITHUB),
+     ("GITHUB", RepoProvider.GITHUB),
+     ("gitlab", RepoProvider.GITLAB),
+     ("Heptapod", RepoProvider.HEPTAPOD),
+     ("bitbucket", RepoProvider.BITBUCKET)])
+def test_provider_from_name(value, expected):
+    assert RepoProvider(value) is expected
+
+
+def test_provider_from_unknown_name():
+    with pytest.raises(ValueError):
+        RepoProvider("sourcehut")
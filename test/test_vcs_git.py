@@ -1,71 +1,152 @@
+from functools import lru_cache
+import os
+from pathlib import Path
+import shutil
+
 import pytest
 
 from dulwich.repo import Repo
-from dulwich.porcelain import update_head, reset, open_repo_closing, active_branch
+from dulwich.porcelain import active_branch
 
 from godot_asset_uploader.vcs import (
     git as git_module,
     guess_vcs_type, get_repo, get_project_root,
     guess_repo_url, guess_repo_provider, guess_issues_url, guess_download_url,
-    guess_commit,
+    guess_commit, invalidate_vcs_cache,
 )
 
 from vcs_urls import (
+    BRANCHES,
     GITHUB_EXPECTED,
     BITBUCKET_EXPECTED,
     GITLAB_EXPECTED,
     GITLAB_SELF_HOSTED_EXPECTED,
 )
 
-BRANCHES = ["main", "branch-https", "push-remote-only"]
+DATA_DIR = Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="session")
+def git_repo_template(tmp_path_factory):
+    "Directory holding the prepared test repos, which the tests clone from"
+    return tmp_path_factory.mktemp("git-template")
+
+
+@lru_cache(maxsize=None)
+def prepare_repo(template_root, repo_name):
+    """Copy test repo REPO_NAME into TEMPLATE_ROOT and make it a real repo. This
+only happens the first time a given repo is asked for"""
+    root = template_root / repo_name
+    shutil.copytree(DATA_DIR / "git" / repo_name, root)
+    # We have to do gymnastics here because git categorically
+    # refuses to track another git repo as plain files
+    (root / "_git").rename(root / ".git")
+    return root
+
+
+def clone_repo_dir(src, dst):
+    """Copy the repo directory SRC to DST. Git objects are never modified once
+written, so those are hardlinked rather than copied where possible"""
+    objects = os.path.join(src, ".git", "objects", "")
+
+    def copy(src, dst):
+        if src.startswith(objects):
+            try:
+                return os.link(src, dst)
+            except OSError:
+                pass
+        return shutil.copy2(src, dst)
+
+    shutil.copytree(src, dst, copy_function=copy)
+    return dst
 
 
 @pytest.fixture
-def tmp_git_repo(shared_datadir):
+def tmp_git_repo(git_repo_template, tmp_path):
     def prepare(repo_name):
-        root = shared_datadir / "git" / repo_name
-        # We have to do gymnastics here because git categorically
-        # refuses to track another git repo as plain files
-        (root / "_git").rename(root / ".git")
-        return root
+        return clone_repo_dir(prepare_repo(git_repo_template, repo_name), tmp_path / repo_name)
     return prepare
 
 
-# NOTE: This is destructive to the index and working tree and will
-# throw away all uncommitted state and not do a merge! Only suitable
-# for use in tests.
+@pytest.fixture(scope="session")
+def readonly_git_repo(git_repo_template):
+    "Like tmp_git_repo, but hands out the shared prepared repo, which must not be modified"
+    def prepare(repo_name):
+        return prepare_repo(git_repo_template, repo_name)
+    return prepare
+
+
+# NOTE: This only points HEAD at BRANCH, and leaves the index and working
+# tree alone, so they won't match the new HEAD! Only suitable for use in
+# tests, which only ever look at HEAD, the refs and the config.
 def reset_branch(repo, branch):
-    branch = branch.encode()
-    with open_repo_closing(repo) as repo:
-        update_head(repo, branch)
-        reset(repo, "hard", branch)
+    with Repo(repo) as repo:
+        repo.refs.set_symbolic_ref(b"HEAD", b"refs/heads/" + branch.encode())
 
 
-def test_git_basic(tmp_git_repo):
-    repo = tmp_git_repo("repo-github")
+def test_git_basic(readonly_git_repo):
+    repo = readonly_git_repo("repo-github")
     assert guess_vcs_type(repo) == (git_module, repo)
     assert isinstance(get_repo(repo), Repo)
     assert get_project_root(repo) == repo
 
 
-@pytest.mark.parametrize(
-    "repo, branch, expected",
-    [("repo-github", branch, GITHUB_EXPECTED) for branch in BRANCHES] +
-    [("repo-bitbucket", branch, BITBUCKET_EXPECTED) for branch in BRANCHES] +
-    [pytest.param(
-        "repo-bitbucket", "branch-https-no-username", BITBUCKET_EXPECTED,
-        marks=pytest.mark.xfail(reason="https://github.com/nephila/giturlparse/pull/108")
-    )] +
-    [("repo-gitlab", branch, GITLAB_EXPECTED) for branch in BRANCHES] +
-    [("repo-gitlab-self-hosted", branch, GITLAB_SELF_HOSTED_EXPECTED) for branch in BRANCHES])
-def test_git_remote(branch, repo, expected, tmp_git_repo):
-    repo = tmp_git_repo(repo)
+def test_git_subdir(tmp_git_repo):
+    repo = tmp_git_repo("repo-github")
+    (subdir := repo / "addons" / "plugin").mkdir(parents=True)
+    assert guess_vcs_type(subdir) == (git_module, repo)
+    assert get_project_root(subdir) == repo
+
+
+def test_git_vcs_type_cached(tmp_git_repo, mocker):
+    repo = tmp_git_repo("repo-github")
+    (subdir := repo / "addons" / "plugin").mkdir(parents=True)
+    assert guess_vcs_type(subdir) == (git_module, repo)
+    has_repo = mocker.spy(git_module, "has_repo")
+    assert guess_vcs_type(subdir) == (git_module, repo)
+    assert get_project_root(subdir) == repo
+    assert has_repo.call_count == 0
+    # A repo created after probing is only picked up once the cache is dropped
+    (subdir / ".git" / "objects").mkdir(parents=True)
+    assert guess_vcs_type(subdir) == (git_module, repo)
+    invalidate_vcs_cache()
+    assert guess_vcs_type(subdir) == (git_module, subdir)
+    assert get_project_root(subdir) == subdir
+
+
+def do_test_git_remote(repo, branch, expected):
     reset_branch(repo, branch)
     # Just a sanity check
-    assert active_branch(repo).decode() == branch
+    with Repo(repo) as r:
+        assert active_branch(r).decode() == branch
 
     assert (remote := guess_repo_url(repo)) == expected.repo_url
     assert (commit := guess_commit(repo)) == expected.commit
     assert guess_repo_provider(remote) == expected.provider
     assert guess_issues_url(remote) == expected.issues_url
     assert guess_download_url(remote, commit) == expected.download_url
+
+
+# Switching branches only repoints HEAD, so all the branches of a repo can
+# share one copy of it
+@pytest.mark.parametrize(
+    "repo_name, expected",
+    [("repo-github", GITHUB_EXPECTED),
+     ("repo-bitbucket", BITBUCKET_EXPECTED),
+     ("repo-gitlab", GITLAB_EXPECTED),
+     ("repo-gitlab-self-hosted", GITLAB_SELF_HOSTED_EXPECTED)],
+    scope="class")
+class TestGitRemote:
+    @pytest.fixture(scope="class")
+    def repo(self, repo_name, git_repo_template, tmp_path_factory):
+        template = prepare_repo(git_repo_template, repo_name)
+        return clone_repo_dir(template, tmp_path_factory.mktemp(repo_name) / repo_name)
+
+    @pytest.mark.parametrize("branch", BRANCHES)
+    def test_git_remote(self, repo, branch, expected):
+        do_test_git_remote(repo, branch, expected)
+
+
+def test_git_remote_bitbucket_no_username(tmp_git_repo):
+    repo = tmp_git_repo("repo-bitbucket")
+    do_test_git_remote(repo, "branch-https-no-username", BITBUCKET_EXPECTED)
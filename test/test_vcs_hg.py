@@ -1,3 +1,6 @@
+from pathlib import Path
+import shutil
+
 import pytest
 
 from hglib.client import hgclient
@@ -13,9 +16,21 @@ from vcs_urls import HEPTAPOD_EXPECTED
 
 COMMIT = "80393d431e2fc344a3bfdb3bc41096278e429916"
 
+DATA_DIR = Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="session")
+def hg_repos(tmp_path_factory):
+    """Copy of the hg test repos shared by the whole session. None of the tests
+modify them, and since hg clients are cached by repo root, this also lets the
+tests share one command server per repo instead of spawning a new one each"""
+    root = tmp_path_factory.mktemp("hg")
+    shutil.copytree(DATA_DIR / "hg", root, symlinks=True, dirs_exist_ok=True)
+    return root
 
-def test_git_basic(shared_datadir):
-    repo = shared_datadir / "hg" / "repo-heptapod"
+
+def test_git_basic(hg_repos):
+    repo = hg_repos / "repo-heptapod"
     assert guess_vcs_type(repo) == (hg, repo)
     assert isinstance(get_repo(repo), hgclient)
     assert get_project_root(repo) == repo
@@ -32,19 +47,15 @@ def do_test_hg_remote(repo, expected):
 @pytest.mark.parametrize(
     "repo, expected",
     [("repo-heptapod", HEPTAPOD_EXPECTED)])
-def test_hg_remote_default(repo, expected, shared_datadir):
-    repo = shared_datadir / "hg" / repo
+def test_hg_remote_default(repo, expected, hg_repos):
+    repo = hg_repos / repo
     do_test_hg_remote(repo, expected)
 
 
 @pytest.mark.parametrize(
     "repo, expected",
-    [("repo-heptapod", HEPTAPOD_EXPECTED)])
-def test_hg_remote_default_push(repo, expected, shared_datadir):
-    repo = shared_datadir / "hg" / repo
-    with (repo / ".hg" / "hgrc").open("w") as hgrc:
-        hgrc.writelines([
-            "[paths]\n"
-            f"default-push = {expected.repo_url}\n"
-        ])
+    [("repo-heptapod-pushonly", HEPTAPOD_EXPECTED)])
+def test_hg_remote_default_push(repo, expected, hg_repos):
+    # This repo only has default-push set in its hgrc
+    repo = hg_repos / repo
     do_test_hg_remote(repo, expected)